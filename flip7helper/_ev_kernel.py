@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import numpy as np
+
+from flip7helper.deck_engine import LABEL_IDX
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional; fall back to plain Python loops.
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+
+def _njit_cached(fn):
+    """
+    njit with numba's on-disk cache, or without it where numba cannot locate
+    the source to cache against (e.g. inside a PyInstaller --onefile exe).
+    """
+    try:
+        return njit(cache=True)(fn)
+    except RuntimeError:
+        return njit(cache=False)(fn)
+
+
+_FLIPTHREE = LABEL_IDX["flipthree"]
+_X2 = LABEL_IDX["x2"]
+
+# Cards that leave the line alone and add a fixed amount to the current
+# bank: (deck slot, points added). Freeze and Second Chance add nothing.
+_FLAT_CARDS = (("freeze", 0), ("secondchance", 0)) + tuple((f"+{m}", m) for m in (2, 4, 6, 8, 10))
+_FLAT_SLOTS = np.array([LABEL_IDX[lbl] for lbl, _ in _FLAT_CARDS], dtype=np.int64)
+_FLAT_POINTS = np.array([pts for _, pts in _FLAT_CARDS], dtype=np.int64)
+
+
+@_njit_cached
+def ev_one_step(
+    counts: np.ndarray,
+    numbers_mask: int,
+    has_second_chance: bool,
+    multiplier_x2: bool,
+    add_points: int,
+    ev_flip_three: float,
+) -> float:
+    """
+    Expected bank after taking exactly one more card, then staying.
+
+    counts is the remaining deck indexed by LABEL_IDX; numbers_mask has bit n
+    set for each number n in the line. ev_flip_three is the value assigned to
+    drawing Flip Three (computed by the caller, which may recurse).
+    """
+    denom = 0
+    for i in range(counts.shape[0]):
+        denom += counts[i]
+
+    mult = 2 if multiplier_x2 else 1
+    number_sum = 0
+    unique = 0
+    for n in range(13):
+        if (numbers_mask >> n) & 1:
+            number_sum += n
+            unique += 1
+    bank = number_sum * mult + add_points
+    current_bank = bank + 15 if unique >= 7 else bank
+    if denom <= 0:
+        return float(current_bank)
+
+    # Integer part: every outcome whose bank is an exact int.
+    total = 0
+    dup = 0
+    new_bonus = 15 if unique + 1 >= 7 else 0
+    for n in range(13):
+        cnt = counts[n]
+        if (numbers_mask >> n) & 1:
+            dup += cnt
+        else:
+            total += cnt * (bank + n * mult + new_bonus)
+    if has_second_chance:
+        # Duplicate is cancelled once; you keep the current bank.
+        total += dup * current_bank
+
+    for j in range(_FLAT_SLOTS.shape[0]):
+        total += counts[_FLAT_SLOTS[j]] * (current_bank + _FLAT_POINTS[j])
+    total += counts[_X2] * (current_bank - bank + number_sum * 2 + add_points)
+
+    return (total + counts[_FLIPTHREE] * ev_flip_three) / denom
+
+
+def warm_up() -> None:
+    """
+    Compile (or load from numba's on-disk cache) ev_one_step with the argument
+    types DecisionEngine uses, so the first real call does not pay for it.
+    Safe to run from a background thread.
+    """
+    # Read-only like DeckComposition.counts_arr; numba types it separately.
+    counts = np.zeros(len(LABEL_IDX), dtype=np.int32)
+    counts.setflags(write=False)
+    ev_one_step(counts, 0, False, False, 0, 0.0)
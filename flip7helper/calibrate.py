@@ -30,9 +30,9 @@ def main() -> None:
 
     with mss.mss() as sct:
         img = sct.grab(monitor)
-        frame = np.array(img)
-        if frame.shape[2] == 4:
-            frame = frame[:, :, :3]  # BGRA -> BGR
+        # View the grab's BGRA buffer directly instead of copying it.
+        frame = np.frombuffer(img.raw, dtype=np.uint8).reshape(img.height, img.width, 4)
+        frame = frame[:, :, :3]  # BGRA -> BGR
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
     cv2.imwrite(str(out_path), frame)
@@ -1,19 +1,23 @@
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
-from typing import Dict, Iterable, Mapping, Tuple
+from typing import Dict, FrozenSet, Mapping, Tuple
 
-from flip7helper.deck_engine import DeckComposition
+import numpy as np
+
+from flip7helper._ev_kernel import ev_one_step
+from flip7helper.deck_engine import IDX_LABEL, LABEL_IDX, DeckComposition
 from flip7helper.state import RoundState
 
 NUMBER_LABELS = tuple(str(i) for i in range(0, 13))
 
-
-def _is_number_label(lbl: str) -> bool:
-    return lbl.isdigit() and 0 <= int(lbl) <= 12
+_FLIPTHREE = LABEL_IDX["flipthree"]
+# Bit n of a RoundState.numbers_mask, for n = 0..12.
+_NUMBER_BITS = 1 << np.arange(13, dtype=np.int64)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DecisionOutput:
     bust_probability_next: float
     bust_probability_flip_three: float
@@ -37,11 +41,37 @@ class DecisionEngine:
     Notes:
       - Action/modifier cards do not bust.
       - Second Chance: next-draw bust is effectively 0 (duplicate is canceled once).
+
+    Results are memoized per (state, remaining deck): RoundState and
+    DeckComposition are both hashable, and the same subproblems recur across
+    Flip Three steps and repeated UI updates.
     """
 
+    CACHE_SIZE = 4096
+
     def __init__(self, composition: DeckComposition | None = None) -> None:
+        # Per-instance caches (a decorated method would share entries across
+        # engines and keep `self` alive).
+        self._deck_cached = functools.lru_cache(maxsize=256)(self._deck_after)
+        self._compute_cached = functools.lru_cache(maxsize=self.CACHE_SIZE)(self._compute_deck)
+        self._flip_three_cached = functools.lru_cache(maxsize=self.CACHE_SIZE)(self._approx_flip_three_uncached)
         self.base = composition or DeckComposition.standard()
 
+    @property
+    def base(self) -> DeckComposition:
+        return self._base
+
+    @base.setter
+    def base(self, composition: DeckComposition) -> None:
+        self._base = composition
+        self.cache_clear()
+
+    def cache_clear(self) -> None:
+        """Drop memoized results (done automatically when `base` is replaced)."""
+        self._deck_cached.cache_clear()
+        self._compute_cached.cache_clear()
+        self._flip_three_cached.cache_clear()
+
     def compute(
         self,
         state: RoundState,
@@ -49,15 +79,44 @@ class DecisionEngine:
         skip_flip_three: bool = False,
         include_flip_three: bool = True,
     ) -> DecisionOutput:
-        seen_counts = dict(seen_counts or {})
-        deck = self.base.remaining_after_seen(seen_counts)
+        if seen_counts:
+            deck = self._deck_cached(frozenset(seen_counts.items()))
+        else:
+            deck = self._base
+        return self._compute_cached(state, deck, skip_flip_three, include_flip_three)
+
+    def compute_from_remaining(
+        self,
+        state: RoundState,
+        remaining: np.ndarray,
+        skip_flip_three: bool = False,
+        include_flip_three: bool = True,
+    ) -> DecisionOutput:
+        """
+        Like compute, for a caller that tracks the remaining deck itself as a
+        count array indexed by LABEL_IDX (copied, so the caller may keep
+        updating it in place).
+        """
+        deck = DeckComposition(counts_arr=remaining)
+        return self._compute_cached(state, deck, skip_flip_three, include_flip_three)
+
+    def _deck_after(self, seen_key: FrozenSet[Tuple[str, int]]) -> DeckComposition:
+        return self._base.remaining_after_seen(dict(seen_key))
+
+    def _compute_deck(
+        self,
+        state: RoundState,
+        deck: DeckComposition,
+        skip_flip_three: bool,
+        include_flip_three: bool,
+    ) -> DecisionOutput:
         denom = deck.total_cards()
         if denom <= 0:
             bank = state.current_bank_value()
             return DecisionOutput(0.0, 0.0, float(bank), float(bank), ("Empty deck",))
 
-        dup_labels = [str(n) for n in state.numbers]
-        p_dup_number = deck.probability_of(dup_labels)
+        in_line = (state.numbers_mask & _NUMBER_BITS) != 0
+        p_dup_number = int(deck.counts_arr[:13][in_line].sum()) / denom
         bust_next = 0.0 if state.has_second_chance else p_dup_number
 
         ev_next = self._ev_one_step_stay_after(state, deck, skip_flip_three=skip_flip_three)
@@ -130,94 +189,28 @@ class DecisionEngine:
 
         current_bank = self._apply_flip7_bonus_if_applicable(state, state.current_bank_value())
 
-        dup_labels = [str(n) for n in state.numbers]
-        p_dup_number = deck.probability_of(dup_labels)
-        ev_dup = float(current_bank) if state.has_second_chance else 0.0
-
-        # New number events
-        ev_new_numbers = 0.0
-        for n in range(0, 13):
-            lbl = str(n)
-            cnt = deck.counts.get(lbl, 0)
-            if cnt <= 0 or n in state.numbers:
-                continue
-            p = cnt / denom
-            nxt_numbers = set(state.numbers)
-            nxt_numbers.add(n)
-            nxt_state = RoundState(
-                numbers=frozenset(nxt_numbers),
-                has_second_chance=state.has_second_chance,
-                flip_three_active=state.flip_three_active,
-                multiplier_x2=state.multiplier_x2,
-                add_points=state.add_points,
-            )
-            bank = self._apply_flip7_bonus_if_applicable(nxt_state, nxt_state.current_bank_value())
-            ev_new_numbers += p * bank
-
-        # Action/modifier events
-        ev_other = 0.0
-
-        cnt = deck.counts.get("freeze", 0)
-        if cnt:
-            ev_other += (cnt / denom) * current_bank
-
-        cnt = deck.counts.get("flipthree", 0)
-        if cnt:
-            p = cnt / denom
-            if skip_flip_three:
-                # When called from within a Flip Three approximation, avoid
-                # recursing again into another Flip Three simulation. Treat
-                # drawing Flip Three as roughly keeping current bank value.
-                ev3 = float(current_bank)
-            else:
-                _, ev3 = self._approx_flip_three(state, deck)
-            ev_other += p * ev3
-
-        cnt = deck.counts.get("secondchance", 0)
-        if cnt:
-            p = cnt / denom
-            nxt_state = RoundState(
-                numbers=state.numbers,
-                has_second_chance=True,
-                flip_three_active=state.flip_three_active,
-                multiplier_x2=state.multiplier_x2,
-                add_points=state.add_points,
+        # When called from within a Flip Three approximation, avoid recursing
+        # again into another Flip Three simulation. Treat drawing Flip Three
+        # as roughly keeping current bank value.
+        ev_flip_three = float(current_bank)
+        if deck.counts_arr[_FLIPTHREE] and not skip_flip_three:
+            _, ev_flip_three = self._approx_flip_three(state, deck)
+
+        return float(
+            ev_one_step(
+                deck.counts_arr,
+                state.numbers_mask,
+                bool(state.has_second_chance),
+                bool(state.multiplier_x2),
+                int(state.add_points),
+                float(ev_flip_three),
             )
-            bank = self._apply_flip7_bonus_if_applicable(nxt_state, nxt_state.current_bank_value())
-            ev_other += p * bank
-
-        cnt = deck.counts.get("x2", 0)
-        if cnt:
-            p = cnt / denom
-            nxt_state = RoundState(
-                numbers=state.numbers,
-                has_second_chance=state.has_second_chance,
-                flip_three_active=state.flip_three_active,
-                multiplier_x2=True,
-                add_points=state.add_points,
-            )
-            bank = self._apply_flip7_bonus_if_applicable(nxt_state, nxt_state.current_bank_value())
-            ev_other += p * bank
-
-        for m in (2, 4, 6, 8, 10):
-            lbl = f"+{m}"
-            cnt = deck.counts.get(lbl, 0)
-            if not cnt:
-                continue
-            p = cnt / denom
-            nxt_state = RoundState(
-                numbers=state.numbers,
-                has_second_chance=state.has_second_chance,
-                flip_three_active=state.flip_three_active,
-                multiplier_x2=state.multiplier_x2,
-                add_points=state.add_points + m,
-            )
-            bank = self._apply_flip7_bonus_if_applicable(nxt_state, nxt_state.current_bank_value())
-            ev_other += p * bank
-
-        return float((p_dup_number * ev_dup) + ev_new_numbers + ev_other)
+        )
 
     def _approx_flip_three(self, state: RoundState, deck: DeckComposition) -> Tuple[float, float]:
+        return self._flip_three_cached(state, deck)
+
+    def _approx_flip_three_uncached(self, state: RoundState, deck: DeckComposition) -> Tuple[float, float]:
         p_bust_total = 0.0
         ev = float(state.current_bank_value())
 
@@ -225,6 +218,10 @@ class DecisionEngine:
         tmp_state = state
         tmp_deck = deck
         seen_local: Dict[str, int] = {}
+        # The line never changes during the walk, so neither do these masks.
+        in_line = (tmp_state.numbers_mask & _NUMBER_BITS) != 0
+        can_draw = np.ones(len(IDX_LABEL), dtype=bool)
+        can_draw[:13] = ~in_line
 
         for _ in range(3):
             # Use a recursion-safe compute that skips its own Flip Three approximation.
@@ -238,27 +235,23 @@ class DecisionEngine:
             denom = tmp_deck.total_cards()
             if denom <= 0:
                 break
-            candidates: Iterable[str] = []
-            if tmp_state.numbers:
-                candidates = [str(n) for n in range(0, 13) if n not in tmp_state.numbers]
-            best = None
-            best_cnt = 0
-            for c in candidates:
-                cnt = tmp_deck.counts.get(c, 0)
-                if cnt > best_cnt:
-                    best, best_cnt = c, cnt
-            if best is None or best_cnt == 0:
-                for k, v in tmp_deck.counts.items():
-                    if v <= 0:
-                        continue
-                    if _is_number_label(k) and int(k) in tmp_state.numbers:
-                        continue
-                    best = k
+            counts = tmp_deck.counts_arr
+            best = -1
+            if tmp_state.numbers_mask:
+                # Most plentiful number not already in the line (first on ties).
+                free_numbers = np.where(in_line, 0, counts[:13])
+                i = int(np.argmax(free_numbers))
+                if free_numbers[i] > 0:
+                    best = i
+            if best < 0:
+                # Otherwise the first remaining card that cannot bust.
+                avail = np.flatnonzero((counts > 0) & can_draw)
+                if avail.size == 0:
                     break
-            if best is None:
-                break
-            seen_local[best] = seen_local.get(best, 0) + 1
-            tmp_deck = tmp_deck.remaining_after_seen({best: 1})
+                best = int(avail[0])
+            label = IDX_LABEL[best]
+            seen_local[label] = seen_local.get(label, 0) + 1
+            tmp_deck = tmp_deck.remaining_after_seen({label: 1})
 
         return float(min(max(p_bust_total, 0.0), 1.0)), float(ev)
 
@@ -1,6 +1,18 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Mapping, Tuple
+
+import numpy as np
+
+# Fixed label <-> slot mapping for the deck count array. Order follows the
+# standard composition: numbers 0..12, actions, +N modifiers, x2.
+IDX_LABEL: Tuple[str, ...] = (
+    tuple(str(n) for n in range(0, 13))
+    + ("freeze", "flipthree", "secondchance")
+    + tuple(f"+{m}" for m in (2, 4, 6, 8, 10))
+    + ("x2",)
+)
+LABEL_IDX: Dict[str, int] = {lbl: i for i, lbl in enumerate(IDX_LABEL)}
 
 
 @dataclass(frozen=True)
@@ -21,9 +33,32 @@ class DeckComposition:
     Modifier cards (6):
     - +2 +4 +6 +8 +10 (1 each)
     - x2 (1)
+
+    Counts are stored as a read-only int32 array indexed by LABEL_IDX.
     """
 
-    counts: Dict[str, int]
+    counts_arr: np.ndarray = field(compare=False)
+    # Raw bytes of the count array: hashable, and used for equality so
+    # compositions can serve as cache keys.
+    _key: bytes = field(init=False, repr=False)
+    _total: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Private copy: freezing the caller's array would make it read-only too.
+        arr = np.array(self.counts_arr, dtype=np.int32, copy=True)
+        arr.setflags(write=False)
+        object.__setattr__(self, "counts_arr", arr)
+        object.__setattr__(self, "_key", arr.tobytes())
+        object.__setattr__(self, "_total", int(arr.sum()))
+
+    @staticmethod
+    def from_counts(counts: Mapping[str, int]) -> "DeckComposition":
+        arr = np.zeros(len(IDX_LABEL), dtype=np.int32)
+        for k, v in counts.items():
+            i = LABEL_IDX.get(k)
+            if i is not None:
+                arr[i] = int(v)
+        return DeckComposition(counts_arr=arr)
 
     @staticmethod
     def standard() -> "DeckComposition":
@@ -38,28 +73,37 @@ class DeckComposition:
         for m in (2, 4, 6, 8, 10):
             counts[f"+{m}"] = 1
         counts["x2"] = 1
-        return DeckComposition(counts=counts)
+        return DeckComposition.from_counts(counts)
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return self.as_dict()
+
+    def count(self, label: str) -> int:
+        i = LABEL_IDX.get(label)
+        return 0 if i is None else int(self.counts_arr[i])
 
     def total_cards(self) -> int:
-        return sum(self.counts.values())
+        return self._total
 
     def remaining_after_seen(self, seen: Mapping[str, int]) -> "DeckComposition":
-        nxt = dict(self.counts)
+        nxt = self.counts_arr.copy()
         for k, v in seen.items():
-            if k not in nxt:
+            i = LABEL_IDX.get(k)
+            if i is None:
                 continue
-            nxt[k] = max(0, nxt[k] - int(v))
-        return DeckComposition(counts=nxt)
+            nxt[i] -= int(v)
+        np.maximum(nxt, 0, out=nxt)
+        return DeckComposition(counts_arr=nxt)
 
     def probability_of(self, keys: Iterable[str]) -> float:
-        denom = self.total_cards()
+        denom = self._total
         if denom <= 0:
             return 0.0
-        num = 0
-        for k in keys:
-            num += self.counts.get(k, 0)
-        return num / denom
+        idx = [LABEL_IDX[k] for k in keys if k in LABEL_IDX]
+        if not idx:
+            return 0.0
+        return int(self.counts_arr[idx].sum()) / denom
 
     def as_dict(self) -> Dict[str, int]:
-        return dict(self.counts)
-
+        return dict(zip(IDX_LABEL, self.counts_arr.tolist()))
@@ -1,13 +1,18 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 
 import cv2
 import numpy as np
 
+# Up to about this many screen pixels, correlating every template against one
+# shared screen spectrum beats per-template cv2.matchTemplate; above it,
+# OpenCV's tiled DFT wins (measured on 22 card templates).
+_SHARED_DFT_MAX_PIXELS = 1 << 20
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Detection:
     label: str
     score: float
@@ -21,24 +26,99 @@ def _nms(dets: List[Detection], iou_threshold: float) -> List[Detection]:
     if not dets:
         return []
     dets = sorted(dets, key=lambda d: d.score, reverse=True)
-    kept: List[Detection] = []
-
-    def iou(a: Detection, b: Detection) -> float:
-        ax1, ay1, ax2, ay2 = a.x, a.y, a.x + a.w, a.y + a.h
-        bx1, by1, bx2, by2 = b.x, b.y, b.x + b.w, b.y + b.h
-        ix1, iy1 = max(ax1, bx1), max(ay1, by1)
-        ix2, iy2 = min(ax2, bx2), min(ay2, by2)
-        iw, ih = max(0, ix2 - ix1), max(0, iy2 - iy1)
+    boxes = np.array([(d.x, d.y, d.x + d.w, d.y + d.h) for d in dets], dtype=np.float64)
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    # Greedy NMS: keep the best remaining box, drop everything overlapping it,
+    # with the IoU against all remaining boxes computed in one shot.
+    keep: List[int] = []
+    order = np.arange(len(dets))
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        rest = order[1:]
+        iw = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        ih = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
         inter = iw * ih
-        if inter == 0:
-            return 0.0
-        union = (a.w * a.h) + (b.w * b.h) - inter
-        return inter / union if union > 0 else 0.0
+        union = areas[i] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        order = rest[iou < iou_threshold]
+    return [dets[i] for i in keep]
+
+
+def _window_norms(sums: np.ndarray, sq_sums: np.ndarray, th: int, tw: int) -> np.ndarray:
+    """
+    L2 norm of each zero-mean th x tw window, read from integral images.
+
+    Result has the shape of a matchTemplate output for a th x tw template.
+    """
+    # In-place updates: two full-size temporaries instead of one per term.
+    s = sums[th:, tw:] - sums[:-th, tw:]
+    s -= sums[th:, :-tw]
+    s += sums[:-th, :-tw]
+    sq = sq_sums[th:, tw:] - sq_sums[:-th, tw:]
+    sq -= sq_sums[th:, :-tw]
+    sq += sq_sums[:-th, :-tw]
+    s *= s
+    s /= float(th * tw)
+    sq -= s
+    np.maximum(sq, 0.0, out=sq)
+    np.sqrt(sq, out=sq)
+    return sq.astype(np.float32)
+
+
+def _normalize(num: np.ndarray, window_norms: np.ndarray, norm: float) -> np.ndarray:
+    """Turn a zero-mean TM_CCORR map into TM_CCOEFF_NORMED scores."""
+    den = window_norms * np.float32(norm)
+    # Flat windows (or a flat template) carry no signal: score 0.
+    return np.divide(num, den, out=np.zeros_like(num), where=den > 1e-6)
+
+
+def _to_gray(screen: np.ndarray) -> np.ndarray:
+    if screen.ndim == 3 and screen.shape[2] == 1:
+        screen = screen[:, :, 0]
+    if screen.ndim == 2:
+        return screen
+    if screen.ndim == 3 and screen.shape[2] == 3:
+        return cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+    if screen.ndim == 3 and screen.shape[2] == 4:
+        return cv2.cvtColor(screen, cv2.COLOR_BGRA2GRAY)
+    raise ValueError("screen must be a 2D grayscale, 3-channel BGR or 4-channel BGRA array")
+
+
+def _shared_spectrum_correlator(screen_f: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Return a TM_CCORR equivalent that reuses one DFT of the screen.
+
+    The screen is transformed once; each call only transforms the (zero
+    padded) template, multiplies spectra and inverts. Only the valid region,
+    where the template never wraps around, is returned.
+    """
+    sh, sw = screen_f.shape[:2]
+    dh, dw = cv2.getOptimalDFTSize(sh), cv2.getOptimalDFTSize(sw)
+    buf = np.zeros((dh, dw), dtype=np.float32)
+    buf[:sh, :sw] = screen_f
+    screen_spec = cv2.dft(buf, nonzeroRows=sh)
+    buf[:sh, :sw] = 0.0
+
+    def correlate(templ: np.ndarray) -> np.ndarray:
+        th, tw = templ.shape[:2]
+        buf[:th, :tw] = templ
+        templ_spec = cv2.dft(buf, nonzeroRows=th)
+        buf[:th, :tw] = 0.0
+        spec = cv2.mulSpectrums(screen_spec, templ_spec, 0, conjB=True)
+        res = cv2.idft(spec, flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE)
+        return res[: sh - th + 1, : sw - tw + 1]
+
+    return correlate
+
 
-    for d in dets:
-        if all(iou(d, k) < iou_threshold for k in kept):
-            kept.append(d)
-    return kept
+def _zero_mean_stats(img: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Zero-mean float32 copy of a template and its L2 norm."""
+    zero_mean = img.astype(np.float32) - np.float32(img.mean())
+    norm = float(np.sqrt(np.square(zero_mean, dtype=np.float64).sum()))
+    return zero_mean, norm
 
 
 class TemplateRecognizer:
@@ -47,6 +127,19 @@ class TemplateRecognizer:
     template images named like:
     - numbers: 0.png..12.png
     - actions/modifiers: freeze.png, flipthree.png, secondchance.png, x2.png, +2.png, ...
+
+    Scores are TM_CCOEFF_NORMED. Template means and norms are computed once at
+    load, and the per-window screen statistics come from integral images built
+    once per frame and shared by every template of the same size.
+
+    With coarse_scale < 1 matching is coarse-to-fine: all templates are first
+    matched on a downscaled screen (at a threshold lowered by coarse_margin),
+    and only the regions around those hits are re-matched at full resolution.
+    Use coarse_scale=1.0 for an exhaustive full-resolution scan.
+
+    With use_opencl=True, and an OpenCL device available, the whole-screen
+    correlations run through OpenCV's T-API (cv2.UMat) on the GPU; otherwise
+    the flag is ignored and matching stays on the CPU.
     """
 
     def __init__(
@@ -55,13 +148,33 @@ class TemplateRecognizer:
         match_threshold: float = 0.80,
         max_per_label: int = 20,
         nms_iou: float = 0.25,
+        coarse_scale: float = 0.5,
+        coarse_margin: float = 0.10,
+        use_opencl: bool = False,
     ) -> None:
         self.assets_dir = Path(assets_dir)
         self.match_threshold = float(match_threshold)
         self.max_per_label = int(max_per_label)
         self.nms_iou = float(nms_iou)
+        self.coarse_scale = float(coarse_scale)
+        self.coarse_margin = float(coarse_margin)
+        if not 0.0 < self.coarse_scale <= 1.0:
+            raise ValueError("coarse_scale must be in (0, 1]")
+        self.use_opencl = bool(use_opencl) and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
         self._templates: Dict[str, np.ndarray] = {}
         self._template_sizes: Dict[str, Tuple[int, int]] = {}
+        # label -> (zero-mean float32 template, L2 norm of that template)
+        self._template_stats: Dict[str, Tuple[np.ndarray, float]] = {}
+        # (h, w) -> labels with that template size
+        self._size_groups: Dict[Tuple[int, int], List[str]] = {}
+        # Same, for templates downscaled by coarse_scale.
+        self._coarse_stats: Dict[str, Tuple[np.ndarray, float]] = {}
+        self._coarse_groups: Dict[Tuple[int, int], List[str]] = {}
+        # label -> zero-mean template uploaded as a UMat (use_opencl only).
+        self._template_umats: Dict[str, cv2.UMat] | None = {} if self.use_opencl else None
+        self._coarse_umats: Dict[str, cv2.UMat] | None = {} if self.use_opencl else None
         self._load_templates()
 
     def _load_templates(self) -> None:
@@ -75,33 +188,140 @@ class TemplateRecognizer:
             self._templates[label] = img
             h, w = img.shape[:2]
             self._template_sizes[label] = (w, h)
+            self._template_stats[label] = _zero_mean_stats(img)
+            if self._template_umats is not None:
+                self._template_umats[label] = cv2.UMat(self._template_stats[label][0])
+            self._size_groups.setdefault((h, w), []).append(label)
+            if self.coarse_scale < 1.0:
+                ch = max(1, int(round(h * self.coarse_scale)))
+                cw = max(1, int(round(w * self.coarse_scale)))
+                small = cv2.resize(img, (cw, ch), interpolation=cv2.INTER_AREA)
+                self._coarse_stats[label] = _zero_mean_stats(small)
+                if self._coarse_umats is not None:
+                    self._coarse_umats[label] = cv2.UMat(self._coarse_stats[label][0])
+                self._coarse_groups.setdefault((ch, cw), []).append(label)
         if not self._templates:
             raise RuntimeError(f"No templates loaded from {self.assets_dir}")
 
     def labels(self) -> Iterable[str]:
         return self._templates.keys()
 
-    def recognize_array(self, screen: np.ndarray) -> List[Detection]:
+    @staticmethod
+    def _match_scores(
+        screen: np.ndarray,
+        stats: Dict[str, Tuple[np.ndarray, float]],
+        groups: Dict[Tuple[int, int], List[str]],
+        umats: Dict[str, cv2.UMat] | None = None,
+    ) -> Iterator[Tuple[str, np.ndarray]]:
         """
-        Run template matching on an in-memory grayscale image.
+        Yield (label, TM_CCOEFF_NORMED score map) for every template that fits.
+
+        Correlating with a zero-mean template makes TM_CCORR equal to the
+        TM_CCOEFF numerator; the denominator is the template norm (precomputed)
+        times the window norm (from the shared integral images). On small
+        screens the correlations also share a single screen spectrum. Given
+        umats (the templates already uploaded as UMat) they run through OpenCL.
         """
-        if screen.ndim == 3:
-            screen = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
-        if screen.ndim != 2:
-            raise ValueError("screen must be a 2D grayscale or 3-channel BGR array")
-        detections: List[Detection] = []
-        for label, templ in self._templates.items():
-            th, tw = templ.shape[:2]
-            sh, sw = screen.shape[:2]
+        sh, sw = screen.shape[:2]
+        screen_f = screen.astype(np.float32)
+        sums, sq_sums = cv2.integral2(screen_f, sdepth=cv2.CV_64F)
+        if umats is not None:
+            screen_u = cv2.UMat(screen_f)
+
+            def correlate(label: str) -> np.ndarray:
+                return cv2.matchTemplate(screen_u, umats[label], cv2.TM_CCORR).get()
+        elif sh * sw <= _SHARED_DFT_MAX_PIXELS:
+            shared = _shared_spectrum_correlator(screen_f)
+
+            def correlate(label: str) -> np.ndarray:
+                return shared(stats[label][0])
+        else:
+            def correlate(label: str) -> np.ndarray:
+                return cv2.matchTemplate(screen_f, stats[label][0], cv2.TM_CCORR)
+        for (th, tw), labels in groups.items():
             if th > sh or tw > sw:
                 continue
+            window_norms = _window_norms(sums, sq_sums, th, tw)
+            for label in labels:
+                yield label, _normalize(correlate(label), window_norms, stats[label][1])
 
-            res = cv2.matchTemplate(screen, templ, cv2.TM_CCOEFF_NORMED)
-            ys, xs = np.where(res >= self.match_threshold)
+    def _hits(self, screen: np.ndarray) -> Iterator[Tuple[str, np.ndarray, np.ndarray, np.ndarray]]:
+        """Yield (label, ys, xs, scores) for all positions at or above the threshold."""
+        if self.coarse_scale >= 1.0:
+            for label, res in self._match_scores(
+                screen, self._template_stats, self._size_groups, self._template_umats
+            ):
+                ys, xs = np.where(res >= self.match_threshold)
+                yield label, ys, xs, res[ys, xs]
+            return
+
+        scale = self.coarse_scale
+        small = cv2.resize(screen, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        sh, sw = screen.shape[:2]
+        # Slack around each coarse hit to absorb rounding of the downscale.
+        pad = int(np.ceil(1.0 / scale)) + 1
+        coarse_threshold = self.match_threshold - self.coarse_margin
+        # Full-resolution float screen and integral images, built on the first
+        # refinement and shared by every region of every template.
+        screen_f: np.ndarray | None = None
+        sums = sq_sums = np.empty(0)
+        for label, res in self._match_scores(small, self._coarse_stats, self._coarse_groups, self._coarse_umats):
+            ys, xs = np.where(res >= coarse_threshold)
+            if xs.size == 0:
+                continue
+            zero_mean, norm = self._template_stats[label]
+            th, tw = zero_mean.shape[:2]
+            ch, cw = self._coarse_stats[label][0].shape[:2]
+
+            # One seed per cluster of coarse hits, best first.
+            seeds: List[Tuple[int, int]] = []
+            for i in np.argsort(res[ys, xs])[::-1]:
+                cy, cx = int(ys[i]), int(xs[i])
+                if any(abs(cy - y) < ch // 2 and abs(cx - x) < cw // 2 for y, x in seeds):
+                    continue
+                seeds.append((cy, cx))
+                if len(seeds) >= self.max_per_label:
+                    break
+
+            hit_ys: List[np.ndarray] = []
+            hit_xs: List[np.ndarray] = []
+            hit_scores: List[np.ndarray] = []
+            for cy, cx in seeds:
+                y0 = max(0, int(cy / scale) - pad)
+                x0 = max(0, int(cx / scale) - pad)
+                y1 = min(sh, int(cy / scale) + th + pad)
+                x1 = min(sw, int(cx / scale) + tw + pad)
+                if y1 - y0 < th or x1 - x0 < tw:
+                    continue
+                if screen_f is None:
+                    screen_f = screen.astype(np.float32)
+                    sums, sq_sums = cv2.integral2(screen_f, sdepth=cv2.CV_64F)
+                num = cv2.matchTemplate(screen_f[y0:y1, x0:x1], zero_mean, cv2.TM_CCORR)
+                # Integral-image differences are translation invariant, so the
+                # region's slice of the full integrals gives its window norms.
+                window_norms = _window_norms(sums[y0 : y1 + 1, x0 : x1 + 1], sq_sums[y0 : y1 + 1, x0 : x1 + 1], th, tw)
+                fine = _normalize(num, window_norms, norm)
+                fys, fxs = np.where(fine >= self.match_threshold)
+                hit_ys.append(fys + y0)
+                hit_xs.append(fxs + x0)
+                hit_scores.append(fine[fys, fxs])
+            if hit_ys:
+                yield label, np.concatenate(hit_ys), np.concatenate(hit_xs), np.concatenate(hit_scores)
+
+    def recognize_array(self, screen: np.ndarray) -> List[Detection]:
+        """
+        Run template matching on an in-memory image.
+
+        Accepts 2D grayscale (used as-is, no copy), 3-channel BGR or 4-channel
+        BGRA (e.g. a raw mss grab, converted in one pass without first
+        dropping the alpha channel).
+        """
+        screen = _to_gray(screen)
+        detections: List[Detection] = []
+        for label, ys, xs, scores in self._hits(screen):
             if xs.size == 0:
                 continue
 
-            scores = res[ys, xs]
             idxs = np.argsort(scores)[::-1][: self.max_per_label]
             w, h = self._template_sizes[label]
             for i in idxs:
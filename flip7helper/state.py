@@ -1,37 +1,64 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import FrozenSet
+from typing import FrozenSet, Iterable, Tuple
 
+# Numbers (ascending) and their sum for each 13-bit line mask.
+_MASK_NUMBERS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(n for n in range(13) if (mask >> n) & 1) for mask in range(1 << 13)
+)
+_MASK_SUMS: Tuple[int, ...] = tuple(sum(nums) for nums in _MASK_NUMBERS)
 
-@dataclass(frozen=True)
+
+def numbers_to_mask(numbers: Iterable[int]) -> int:
+    mask = 0
+    for n in numbers:
+        if not 0 <= n <= 12:
+            raise ValueError(f"number cards are 0..12, got {n!r}")
+        mask |= 1 << n
+    return mask
+
+
+@dataclass(frozen=True, slots=True)
 class RoundState:
     """
     What we can infer from the screenshot (current round only).
 
-    - numbers: unique number cards currently in your line (busting set)
+    - numbers_mask: unique number cards currently in your line (busting set),
+      bit n set when number n is in the line
     - has_second_chance: whether you hold Second Chance right now
     - flip_three_active: whether you are forced to take next 3 cards
     - multiplier_x2: whether x2 is currently held (affects EV/risk)
     - add_points: sum of +2/+4/+6/+8/+10 currently held
     """
 
-    numbers: FrozenSet[int]
+    numbers_mask: int = 0
     has_second_chance: bool = False
     flip_three_active: bool = False
     multiplier_x2: bool = False
     add_points: int = 0
 
+    @staticmethod
+    def from_numbers(numbers: Iterable[int], **kwargs) -> "RoundState":
+        return RoundState(numbers_mask=numbers_to_mask(numbers), **kwargs)
+
+    @property
+    def numbers(self) -> FrozenSet[int]:
+        return frozenset(_MASK_NUMBERS[self.numbers_mask])
+
+    @property
+    def sorted_numbers(self) -> Tuple[int, ...]:
+        return _MASK_NUMBERS[self.numbers_mask]
+
     @property
     def unique_count(self) -> int:
-        return len(self.numbers)
+        return self.numbers_mask.bit_count()
 
     @property
     def number_sum(self) -> int:
-        return sum(self.numbers)
+        return _MASK_SUMS[self.numbers_mask]
 
     def current_bank_value(self) -> int:
         base = self.number_sum
         if self.multiplier_x2:
             base *= 2
         return base + self.add_points
-
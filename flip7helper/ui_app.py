@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import dataclasses
+import functools
+import threading
 import tkinter as tk
+from tkinter import font as tkfont
 from tkinter import ttk
-from typing import Dict
+from typing import Dict, Iterable, Set, Tuple
 
-from flip7helper.decision_engine import DecisionEngine
+import numpy as np
+
+from flip7helper._ev_kernel import warm_up as warm_up_ev_kernel
+from flip7helper.deck_engine import LABEL_IDX
+from flip7helper.decision_engine import DecisionEngine, DecisionOutput
 from flip7helper.state import RoundState
 
 
@@ -20,24 +28,41 @@ class Flip7UI(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
         self.title("Flip7 Helper (Manual)")
+        # Load the compiled EV kernel while the widgets are being built.
+        threading.Thread(target=warm_up_ev_kernel, daemon=True).start()
 
         # Current round state (your active line + held modifiers)
-        self.state = RoundState(numbers=frozenset())
+        self.state = RoundState()
         self.decision = DecisionEngine()
+        # Outputs keyed by (state, remaining-deck bytes): toggling a control
+        # off and on again repeats the same key. Per-instance so the
+        # cache does not keep the window alive.
+        self._compute_cached = functools.lru_cache(maxsize=4096)(self._compute_uncached)
 
         # Deck tracker: how many copies of each card have been seen in the
         # current shoe (including discarded / banked cards and your line).
         # Keys use the same labels as DeckComposition: "0".."12", "freeze",
         # "flipthree", "secondchance", "x2", "+2".."+10".
         self.seen_counts: Dict[str, int] = {}
+        # Remaining deck as a count array indexed by LABEL_IDX, kept in step
+        # with seen_counts one label at a time and handed to the engine as is.
+        self._remaining = self.decision.base.counts_arr.copy()
 
-        # Static totals for each card in the standard 94-card deck.
-        self._deck_totals: Dict[str, int] = dict(self.decision.base.counts)
         # StringVars used to display "remaining/total" for each label.
         self._deck_count_vars: Dict[str, tk.StringVar] = {}
+        # Labels whose seen count changed; their deck counters are refreshed
+        # once, on the next _recompute.
+        self._dirty_deck_labels: Set[str] = set()
+        # (state, output) last written to the labels; unchanged pairs skip the
+        # label updates entirely.
+        self._last_applied: Tuple[RoundState, DecisionOutput] | None = None
+        # True while a _recompute is queued with after_idle.
+        self._recompute_pending = False
 
         self._build_widgets()
-        self._recompute()
+        # Scheduled, so the first compute runs once the window has been drawn
+        # (labels show "--" until then).
+        self._schedule_recompute()
 
     # ------------------------------------------------------------------ UI
     def _build_widgets(self) -> None:
@@ -46,19 +71,51 @@ class Flip7UI(tk.Tk):
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
 
+        # Named fonts: Tk resolves each once and every widget shares it.
+        family = "Segoe UI"
+        self._f_small = tkfont.Font(self, name="Flip7Small", family=family, size=12)
+        self._f_small_bold = tkfont.Font(self, name="Flip7SmallBold", family=family, size=12, weight="bold")
+        self._f_output = tkfont.Font(self, name="Flip7Output", family=family, size=13)
+        self._f_deck = tkfont.Font(self, name="Flip7Deck", family=family, size=14)
+        self._f_body = tkfont.Font(self, name="Flip7Body", family=family, size=15)
+        self._f_heading = tkfont.Font(self, name="Flip7Heading", family=family, size=15, weight="bold")
+        self._f_big = tkfont.Font(self, name="Flip7Big", family=family, size=18)
+
         style = ttk.Style(self)
         # Bigger controls (fills space better)
         # Buttons: slightly smaller to avoid overlap
-        style.configure("TButton", padding=(7, 5), font=("Segoe UI", 12))
+        style.configure("TButton", padding=(7, 5), font=self._f_small)
         style.configure("TCheckbutton", padding=(6, 4))
         # ~1.5x font scale across the app
-        style.configure("TLabelframe.Label", font=("Segoe UI", 15, "bold"))
-        style.configure("TLabel", font=("Segoe UI", 15))
+        style.configure("TLabelframe.Label", font=self._f_heading)
+        style.configure("TLabel", font=self._f_body)
         # Line checkbox TEXT back to normal; indicator size handled via images.
-        style.configure("Big.TCheckbutton", padding=(10, 8), font=("Segoe UI", 18))
+        style.configure("Big.TCheckbutton", padding=(6, 4), font=self._f_big)
 
         # Custom bigger checkbox indicators (box size ~1.5x).
         self._cb_off, self._cb_on = self._make_checkbox_images(size=24)
+        # The theme's own indicator can't be resized, so Big.TCheckbutton
+        # draws an image element instead (_cb_on when selected). An image
+        # element works in every theme, unlike ttk's missing selectimage.
+        style.element_create("Flip7.indicator", "image", self._cb_off, ("selected", self._cb_on))
+        style.layout(
+            "Big.TCheckbutton",
+            [
+                (
+                    "Checkbutton.padding",
+                    {
+                        "sticky": "nswe",
+                        "children": [
+                            ("Flip7.indicator", {"side": "left", "sticky": ""}),
+                            (
+                                "Checkbutton.focus",
+                                {"side": "left", "sticky": "w", "children": [("Checkbutton.label", {"sticky": "nswe"})]},
+                            ),
+                        ],
+                    },
+                )
+            ],
+        )
 
         # Keep UI compact: no big header/notes; prioritize buttons.
 
@@ -79,18 +136,18 @@ class Flip7UI(tk.Tk):
             base_row = block * 3
             lbl = str(i)
             minus = ttk.Button(
-                num_deck_frame, text="-", width=4, command=lambda k=lbl: self._adjust_seen(k, -1)
+                num_deck_frame, text="-", width=4, command=functools.partial(self._adjust_seen, lbl, -1)
             )
             minus.grid(row=base_row + 0, column=col, padx=(1, 0), pady=1)
             plus = ttk.Button(
-                num_deck_frame, text=lbl, width=5, command=lambda k=lbl: self._adjust_seen(k, +1)
+                num_deck_frame, text=lbl, width=5, command=functools.partial(self._adjust_seen, lbl, +1)
             )
             plus.grid(row=base_row + 1, column=col, padx=(1, 0), pady=1)
 
             # Remaining / total label for this number
             var = tk.StringVar()
             self._deck_count_vars[lbl] = var
-            ttk.Label(num_deck_frame, textvariable=var, font=("Segoe UI", 14)).grid(
+            ttk.Label(num_deck_frame, textvariable=var, font=self._f_deck).grid(
                 row=base_row + 2, column=col, padx=(1, 0), pady=(0, 2)
             )
 
@@ -109,10 +166,10 @@ class Flip7UI(tk.Tk):
             self._deck_count_vars[label] = var
             ttk.Label(cell, textvariable=var).grid(row=0, column=0, sticky="w", padx=(0, 8))
             ttk.Button(
-                cell, text="-", width=3, command=lambda k=label: self._adjust_seen(k, -1)
+                cell, text="-", width=3, command=functools.partial(self._adjust_seen, label, -1)
             ).grid(row=0, column=1, padx=2, pady=2, sticky="w")
             ttk.Button(
-                cell, text="+1", width=4, command=lambda k=label: self._adjust_seen(k, +1)
+                cell, text="+1", width=4, command=functools.partial(self._adjust_seen, label, +1)
             ).grid(row=0, column=2, padx=2, pady=2, sticky="w")
 
         add_deck_row(0, "freeze", "freeze")
@@ -139,20 +196,12 @@ class Flip7UI(tk.Tk):
         for i in range(0, 13):
             var = tk.IntVar(value=0)
             self._line_number_vars[i] = var
-            # ttk.Checkbutton doesn't support selectimage on Windows; use
-            # classic tk.Checkbutton for custom indicator images.
-            chk = tk.Checkbutton(
+            chk = ttk.Checkbutton(
                 nums_line_frame,
                 text=str(i),
                 variable=var,
-                command=self._sync_line_numbers_from_vars,
-                image=self._cb_off,
-                selectimage=self._cb_on,
-                compound="left",
-                indicatoron=False,
-                padx=6,
-                pady=4,
-                font=("Segoe UI", 18),
+                command=functools.partial(self._toggle_line_number, i),
+                style="Big.TCheckbutton",
             )
             r, c = divmod(i, 7)
             chk.grid(row=r + 1, column=c, padx=4, pady=3, sticky="w")
@@ -178,7 +227,7 @@ class Flip7UI(tk.Tk):
         for idx, m in enumerate(plus_values):
             r = 0 if idx < 3 else 1
             c = (idx % 3) + 1
-            btn = ttk.Button(add_frame, text=f"+{m}", command=lambda v=m: self._on_add_points(v))
+            btn = ttk.Button(add_frame, text=f"+{m}", command=functools.partial(self._on_add_points, m))
             btn.grid(row=r, column=c, sticky="w", padx=4, pady=4)
 
         # Summary / output labels
@@ -186,28 +235,48 @@ class Flip7UI(tk.Tk):
         out_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 6))
         out_frame.columnconfigure(0, weight=1)
 
-        # Reduce output text size (~0.8x)
-        self.bust_label = ttk.Label(out_frame, text="Bust next: --", font=("Segoe UI", 12, "bold"))
+        # Reduce output text size (~0.8x). Labels are bound to StringVars, so
+        # each update is a single Tcl variable set (skipped when unchanged, see
+        # _set_output).
+        self._output_vars: Dict[str, tk.StringVar] = {}
+        self._output_texts: Dict[str, str] = {}
+        self._output_vars["bust"] = tk.StringVar(value="Bust next: --")
+        self.bust_label = ttk.Label(out_frame, textvariable=self._output_vars["bust"], font=self._f_small_bold)
         self.bust_label.grid(row=0, column=0, sticky="w", padx=2, pady=2)
 
-        self.recommend_label = ttk.Label(out_frame, text="Recommendation: --", font=("Segoe UI", 12, "bold"))
+        self._output_vars["recommend"] = tk.StringVar(value="Recommendation: --")
+        self.recommend_label = ttk.Label(out_frame, textvariable=self._output_vars["recommend"], font=self._f_small_bold)
         self.recommend_label.grid(row=0, column=1, sticky="w", padx=(20, 2), pady=2)
 
-        self.ev_label = ttk.Label(out_frame, text="EV (take 1 then stay): --", font=("Segoe UI", 13))
+        self._output_vars["ev"] = tk.StringVar(value="EV (take 1 then stay): --")
+        self.ev_label = ttk.Label(out_frame, textvariable=self._output_vars["ev"], font=self._f_output)
         self.ev_label.grid(row=1, column=0, sticky="w", padx=2, pady=2)
 
-        self.threshold_label = ttk.Label(out_frame, text="Bust threshold (P*): --", font=("Segoe UI", 13))
+        self._output_vars["threshold"] = tk.StringVar(value="Bust threshold (P*): --")
+        self.threshold_label = ttk.Label(out_frame, textvariable=self._output_vars["threshold"], font=self._f_output)
         self.threshold_label.grid(row=1, column=1, sticky="w", padx=(20, 2), pady=2)
 
-        self.flip3_label = ttk.Label(out_frame, text="Flip Three: --", font=("Segoe UI", 12))
+        self._output_vars["flip3"] = tk.StringVar(value="Flip Three: --")
+        self.flip3_label = ttk.Label(out_frame, textvariable=self._output_vars["flip3"], font=self._f_small)
         self.flip3_label.grid(row=2, column=0, sticky="w", padx=2, pady=2)
 
-        self.bank_label = ttk.Label(out_frame, text="Bank: 0", font=("Segoe UI", 12))
+        self._output_vars["bank"] = tk.StringVar(value="Bank: 0")
+        self.bank_label = ttk.Label(out_frame, textvariable=self._output_vars["bank"], font=self._f_small)
         self.bank_label.grid(row=2, column=1, sticky="w", padx=(20, 2), pady=2)
 
-        self.numbers_label = ttk.Label(out_frame, text="Numbers: []", font=("Segoe UI", 12))
+        self._output_vars["numbers"] = tk.StringVar(value="Numbers: []")
+        self.numbers_label = ttk.Label(out_frame, textvariable=self._output_vars["numbers"], font=self._f_small)
         self.numbers_label.grid(row=3, column=0, sticky="w", padx=2, pady=2)
 
+        # label -> (var, total) for each deck counter, with totals read once
+        # from the engine's base deck, plus the text last shown, so refreshes
+        # skip the Tcl round-trip for labels that did not change.
+        base = self.decision.base
+        self._deck_rows: Dict[str, Tuple[tk.StringVar, int]] = {
+            label: (var, base.count(label)) for label, var in self._deck_count_vars.items()
+        }
+        self._deck_texts: Dict[str, str] = {}
+
         # Initialize deck count labels now that widgets exist
         self._refresh_deck_counts()
 
@@ -235,30 +304,16 @@ class Flip7UI(tk.Tk):
         border = "#333333"
         check = "#1a73e8"
 
-        off = tk.PhotoImage(width=size, height=size)
-        on = tk.PhotoImage(width=size, height=size)
-
-        # fill background
-        off.put(bg, to=(0, 0, size, size))
-        on.put(bg, to=(0, 0, size, size))
-
+        # Rasterize into a color grid with numpy, then hand each image to Tk
+        # with a single put() instead of one call per pixel.
+        ys, xs = np.mgrid[0:size, 0:size]
         # border thickness
         t = max(2, size // 12)
-        # draw border rectangle
-        for img in (off, on):
-            # top/bottom
-            img.put(border, to=(0, 0, size, t))
-            img.put(border, to=(0, size - t, size, size))
-            # left/right
-            img.put(border, to=(0, 0, t, size))
-            img.put(border, to=(size - t, 0, size, size))
+        frame = (xs < t) | (xs >= size - t) | (ys < t) | (ys >= size - t)
+        box = np.where(frame, border, bg)
 
         # draw checkmark on "on"
         # simple diagonal strokes scaled by size
-        def put_pixel(x: int, y: int) -> None:
-            if 0 <= x < size and 0 <= y < size:
-                on.put(check, (x, y))
-
         # coordinates as fractions of the box
         x1, y1 = int(size * 0.25), int(size * 0.55)
         x2, y2 = int(size * 0.42), int(size * 0.72)
@@ -267,24 +322,25 @@ class Flip7UI(tk.Tk):
         # stroke thickness
         sw = max(2, size // 10)
 
-        # line x1,y1 -> x2,y2
-        steps = max(abs(x2 - x1), abs(y2 - y1), 1)
-        for s in range(steps + 1):
-            x = x1 + (x2 - x1) * s // steps
-            y = y1 + (y2 - y1) * s // steps
-            for dx in range(-sw, sw + 1):
-                for dy in range(-sw, sw + 1):
-                    put_pixel(x + dx, y + dy)
-
-        # line x2,y2 -> x3,y3
-        steps = max(abs(x3 - x2), abs(y3 - y2), 1)
-        for s in range(steps + 1):
-            x = x2 + (x3 - x2) * s // steps
-            y = y2 + (y3 - y2) * s // steps
-            for dx in range(-sw, sw + 1):
-                for dy in range(-sw, sw + 1):
-                    put_pixel(x + dx, y + dy)
+        # Each stroke is a (2*sw+1)-pixel square stamped at every step along
+        # the line: a pixel is inked if it is within sw (per axis) of a step.
+        stroke = np.zeros((size, size), dtype=bool)
+        for (ax, ay), (bx, by) in (((x1, y1), (x2, y2)), ((x2, y2), (x3, y3))):
+            steps = max(abs(bx - ax), abs(by - ay), 1)
+            s = np.arange(steps + 1)
+            px = ax + (bx - ax) * s // steps
+            py = ay + (by - ay) * s // steps
+            near = (np.abs(xs[..., None] - px) <= sw) & (np.abs(ys[..., None] - py) <= sw)
+            stroke |= near.any(axis=-1)
+        ticked = np.where(stroke, check, box)
+
+        def to_data(grid: np.ndarray) -> str:
+            return " ".join("{" + " ".join(row) + "}" for row in grid.tolist())
 
+        off = tk.PhotoImage(width=size, height=size)
+        on = tk.PhotoImage(width=size, height=size)
+        off.put(to_data(box), to=(0, 0))
+        on.put(to_data(ticked), to=(0, 0))
         return off, on
 
     # ----------------------------------------------------------------- logic
@@ -292,31 +348,57 @@ class Flip7UI(tk.Tk):
     def _fmt_pct(x: float) -> str:
         return f"{100.0 * x:.1f}%"
 
-    def _recompute(self) -> None:
+    def _compute_uncached(self, state: RoundState, remaining_key: bytes) -> DecisionOutput:
+        remaining = np.frombuffer(remaining_key, dtype=self._remaining.dtype)
         # Reduce CPU: don't simulate Flip Three unless it is active.
-        out = self.decision.compute(self.state, self.seen_counts, include_flip_three=self.state.flip_three_active)
+        return self.decision.compute_from_remaining(state, remaining, include_flip_three=state.flip_three_active)
+
+    def _set_output(self, key: str, text: str) -> None:
+        if self._output_texts.get(key) != text:
+            self._output_texts[key] = text
+            self._output_vars[key].set(text)
+
+    def _schedule_recompute(self) -> None:
+        """Queue one _recompute for when Tk is idle; repeated calls coalesce."""
+        if not self._recompute_pending:
+            self._recompute_pending = True
+            self.after_idle(self._run_recompute)
+
+    def _run_recompute(self) -> None:
+        self._recompute_pending = False
+        self._recompute()
+
+    def _recompute(self) -> None:
+        if self._dirty_deck_labels:
+            self._refresh_deck_counts(self._dirty_deck_labels)
+            self._dirty_deck_labels = set()
+
+        out = self._compute_cached(self.state, self._remaining.tobytes())
+        applied = (self.state, out)
+        if applied == self._last_applied:
+            return
+        self._last_applied = applied
 
-        nums_sorted = sorted(self.state.numbers)
         bank = self.state.current_bank_value()
-        self.numbers_label.config(text=f"Numbers: {nums_sorted}")
-        self.bank_label.config(
-            text=f"Bank (stay now): {bank}   x2={self.state.multiplier_x2}  "
+        self._set_output("numbers", f"Numbers: {list(self.state.sorted_numbers)}")
+        self._set_output(
+            "bank",
+            f"Bank (stay now): {bank}   x2={self.state.multiplier_x2}  "
             f"+mods={self.state.add_points}  SC={self.state.has_second_chance}"
         )
 
-        self.bust_label.config(text=f"Bust next: {self._fmt_pct(out.bust_probability_next)}")
-        self.ev_label.config(text=f"EV (take 1 then stay): {out.expected_value_next:.2f}")
-        self.threshold_label.config(
-            text=f"Bust threshold (P*): {self._fmt_pct(out.threshold_probability_next)}"
-        )
+        self._set_output("bust", f"Bust next: {self._fmt_pct(out.bust_probability_next)}")
+        self._set_output("ev", f"EV (take 1 then stay): {out.expected_value_next:.2f}")
+        self._set_output("threshold", f"Bust threshold (P*): {self._fmt_pct(out.threshold_probability_next)}")
 
         if self.state.flip_three_active:
-            self.flip3_label.config(
-                text=f"Flip Three: bust={self._fmt_pct(out.bust_probability_flip_three)}, "
+            self._set_output(
+                "flip3",
+                f"Flip Three: bust={self._fmt_pct(out.bust_probability_flip_three)}, "
                 f"EV≈{out.expected_value_flip_three:.2f}"
             )
         else:
-            self.flip3_label.config(text="Flip Three: not active")
+            self._set_output("flip3", "Flip Three: not active")
 
         # Marginal stopping rule:
         # Take another card only if bust probability is below the
@@ -330,140 +412,108 @@ class Flip7UI(tk.Tk):
             rec = "Recommendation: STAY"
         else:
             rec = "Recommendation: NEUTRAL (near break-even)"
-        self.recommend_label.config(text=rec)
+        self._set_output("recommend", rec)
+        # Flush the redraw once, after every output label has been updated.
+        self.update_idletasks()
 
         # Notes panel removed (kept UI compact).
 
     # ------------------------------ button handlers (mutate state then recompute)
-    def _remaining_total_for(self, label: str) -> tuple[int, int]:
-        total = int(self._deck_totals.get(label, 0))
-        seen = int(self.seen_counts.get(label, 0))
-        remaining = max(0, total - seen)
-        return remaining, total
-
-    def _refresh_deck_counts(self) -> None:
-        for label, var in self._deck_count_vars.items():
-            remaining, total = self._remaining_total_for(label)
-            var.set(f"{label}: {remaining}/{total}")
-
-    def _adjust_seen(self, label: str, delta: int) -> None:
-        """Adjust how many copies of a given card have been seen in the deck."""
+    def _refresh_deck_counts(self, labels: Iterable[str] | None = None) -> None:
+        """Update the remaining/total counters for labels (default: all)."""
+        seen_counts = self.seen_counts
+        texts = self._deck_texts
+        rows = self._deck_rows
+        for label in rows if labels is None else labels:
+            row = rows.get(label)
+            if row is None:
+                continue
+            var, total = row
+            remaining = max(0, total - seen_counts.get(label, 0))
+            text = f"{label}: {remaining}/{total}"
+            if texts.get(label) != text:
+                texts[label] = text
+                var.set(text)
+
+    def _adjust_seen(self, label: str, delta: int, *, recompute: bool = True) -> None:
+        """
+        Adjust how many copies of a given card have been seen in the deck.
+
+        Pass recompute=False when the caller changes more state and will
+        schedule the recompute itself (which also refreshes the deck labels).
+        """
         cur = self.seen_counts.get(label, 0)
         cur = max(0, cur + delta)
         if cur == 0:
             self.seen_counts.pop(label, None)
         else:
             self.seen_counts[label] = cur
-        self._refresh_deck_counts()
-        if not getattr(self, "_suppress_recompute", False):
-            self._recompute()
-
-    def _sync_line_numbers_from_vars(self) -> None:
-        """Update the active line numbers from the checkbuttons and sync deck counts."""
-        prev_nums = set(self.state.numbers)
-        nums = {n for n, var in self._line_number_vars.items() if var.get()}
-
-        # Batch deck updates to avoid recomputing repeatedly while toggling.
-        self._suppress_recompute = True
-        try:
-            for n in nums - prev_nums:
-                self._adjust_seen(str(n), +1)
-        finally:
-            self._suppress_recompute = False
-
-        self.state = RoundState(
-            numbers=frozenset(nums),
-            has_second_chance=self.state.has_second_chance,
-            flip_three_active=self.state.flip_three_active,
-            multiplier_x2=self.state.multiplier_x2,
-            add_points=self.state.add_points,
-        )
-        self._recompute()
+        i = LABEL_IDX.get(label)
+        if i is not None:
+            self._remaining[i] = max(0, self.decision.base.counts_arr[i] - cur)
+        self._dirty_deck_labels.add(label)
+        if recompute:
+            self._schedule_recompute()
+
+    def _toggle_line_number(self, n: int) -> None:
+        """Apply one line checkbutton click; a newly added number is also marked seen."""
+        bit = 1 << n
+        if self._line_number_vars[n].get():
+            if self.state.numbers_mask & bit:
+                return
+            self._adjust_seen(str(n), +1, recompute=False)
+            mask = self.state.numbers_mask | bit
+        else:
+            mask = self.state.numbers_mask & ~bit
+        self.state = dataclasses.replace(self.state, numbers_mask=mask)
+        self._schedule_recompute()
 
     def _on_second_chance(self) -> None:
         new_flag = not self.state.has_second_chance
         # When Second Chance is gained, also mark one copy as seen in the deck.
         if new_flag and not self.state.has_second_chance:
-            self._suppress_recompute = True
-            try:
-                self._adjust_seen("secondchance", +1)
-            finally:
-                self._suppress_recompute = False
-        self.state = RoundState(
-            numbers=self.state.numbers,
-            has_second_chance=new_flag,
-            flip_three_active=self.state.flip_three_active,
-            multiplier_x2=self.state.multiplier_x2,
-            add_points=self.state.add_points,
-        )
-        self._recompute()
+            self._adjust_seen("secondchance", +1, recompute=False)
+        self.state = dataclasses.replace(self.state, has_second_chance=new_flag)
+        self._schedule_recompute()
 
     def _on_flip_three(self) -> None:
         new_flag = not self.state.flip_three_active
         if new_flag and not self.state.flip_three_active:
-            self._suppress_recompute = True
-            try:
-                self._adjust_seen("flipthree", +1)
-            finally:
-                self._suppress_recompute = False
-        self.state = RoundState(
-            numbers=self.state.numbers,
-            has_second_chance=self.state.has_second_chance,
-            flip_three_active=new_flag,
-            multiplier_x2=self.state.multiplier_x2,
-            add_points=self.state.add_points,
-        )
-        self._recompute()
+            self._adjust_seen("flipthree", +1, recompute=False)
+        self.state = dataclasses.replace(self.state, flip_three_active=new_flag)
+        self._schedule_recompute()
 
     def _on_x2(self) -> None:
         new_flag = not self.state.multiplier_x2
         if new_flag and not self.state.multiplier_x2:
-            self._suppress_recompute = True
-            try:
-                self._adjust_seen("x2", +1)
-            finally:
-                self._suppress_recompute = False
-        self.state = RoundState(
-            numbers=self.state.numbers,
-            has_second_chance=self.state.has_second_chance,
-            flip_three_active=self.state.flip_three_active,
-            multiplier_x2=new_flag,
-            add_points=self.state.add_points,
-        )
-        self._recompute()
+            self._adjust_seen("x2", +1, recompute=False)
+        self.state = dataclasses.replace(self.state, multiplier_x2=new_flag)
+        self._schedule_recompute()
 
     def _on_add_points(self, amount: int) -> None:
         # Each click represents drawing one +N card from the deck and holding it.
-        self._suppress_recompute = True
-        try:
-            self._adjust_seen(f"+{amount}", +1)
-        finally:
-            self._suppress_recompute = False
-        self.state = RoundState(
-            numbers=self.state.numbers,
-            has_second_chance=self.state.has_second_chance,
-            flip_three_active=self.state.flip_three_active,
-            multiplier_x2=self.state.multiplier_x2,
-            add_points=self.state.add_points + amount,
-        )
-        self._recompute()
+        self._adjust_seen(f"+{amount}", +1, recompute=False)
+        self.state = dataclasses.replace(self.state, add_points=self.state.add_points + amount)
+        self._schedule_recompute()
 
     def _on_reset_round(self) -> None:
         # Reset both the line and the deck tracker for a fresh shoe.
-        self.state = RoundState(numbers=frozenset())
+        self.state = RoundState()
         self.seen_counts.clear()
+        self._remaining[:] = self.decision.base.counts_arr
+        self._compute_cached.cache_clear()
+        self._dirty_deck_labels.update(self._deck_rows)
         # Clear line checkboxes
         for var in self._line_number_vars.values():
             var.set(0)
-        self._refresh_deck_counts()
-        self._recompute()
+        self._schedule_recompute()
 
     def _on_clear_line(self) -> None:
         # Clear only the current line (numbers + modifiers), keep deck history.
-        self.state = RoundState(numbers=frozenset())
+        self.state = RoundState()
         for var in self._line_number_vars.values():
             var.set(0)
-        self._recompute()
+        self._schedule_recompute()
 
 
 def main() -> None:
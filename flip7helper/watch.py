@@ -1,9 +1,12 @@
 from __future__ import annotations
 import argparse
+import functools
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, List, Set
+from typing import Dict, Iterable, List, Set, Tuple
 
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
@@ -13,39 +16,57 @@ from .recognition_engine import Detection, TemplateRecognizer
 from .state import RoundState
 
 
+# What a detected label contributes to the round state: (kind, value).
+_NUMBER, _ADD_POINTS, _FLAG = range(3)
+_SECOND_CHANCE, _FLIP_THREE, _X2 = 1, 2, 4
+_NO_EFFECT = (_FLAG, 0)
+
+
+def _parse_label(lbl: str) -> Tuple[int, int]:
+    if lbl.isdigit():
+        n = int(lbl)
+        return (_NUMBER, 1 << n) if 0 <= n <= 12 else _NO_EFFECT
+    if lbl.startswith("+"):
+        try:
+            return _ADD_POINTS, int(lbl[1:])
+        except ValueError:
+            return _NO_EFFECT
+    return _NO_EFFECT
+
+
+# Prefilled for the standard labels; any other label is parsed on first sight
+# and remembered, so each detection costs one dict lookup.
+_LABEL_EFFECTS: Dict[str, Tuple[int, int]] = {
+    **{str(n): (_NUMBER, 1 << n) for n in range(13)},
+    **{f"+{m}": (_ADD_POINTS, m) for m in (2, 4, 6, 8, 10)},
+    "secondchance": (_FLAG, _SECOND_CHANCE),
+    "flipthree": (_FLAG, _FLIP_THREE),
+    "x2": (_FLAG, _X2),
+}
+
+
 def _derive_state(detections: Iterable[Detection]) -> RoundState:
-    nums: Set[int] = set()
-    has_sc = False
-    has_ft = False
-    has_x2 = False
+    mask = 0
+    flags = 0
     add_pts = 0
 
     for d in detections:
-        lbl = d.label
-        if lbl.isdigit():
-            try:
-                n = int(lbl)
-                if 0 <= n <= 12:
-                    nums.add(n)
-            except ValueError:
-                pass
-        elif lbl == "secondchance":
-            has_sc = True
-        elif lbl == "flipthree":
-            has_ft = True
-        elif lbl == "x2":
-            has_x2 = True
-        elif lbl.startswith("+"):
-            try:
-                add_pts += int(lbl[1:])
-            except ValueError:
-                pass
+        effect = _LABEL_EFFECTS.get(d.label)
+        if effect is None:
+            effect = _LABEL_EFFECTS[d.label] = _parse_label(d.label)
+        kind, value = effect
+        if kind == _NUMBER:
+            mask |= value
+        elif kind == _ADD_POINTS:
+            add_pts += value
+        else:
+            flags |= value
 
     return RoundState(
-        numbers=frozenset(nums),
-        has_second_chance=has_sc,
-        flip_three_active=has_ft,
-        multiplier_x2=has_x2,
+        numbers_mask=mask,
+        has_second_chance=bool(flags & _SECOND_CHANCE),
+        flip_three_active=bool(flags & _FLIP_THREE),
+        multiplier_x2=bool(flags & _X2),
         add_points=add_pts,
     )
 
@@ -58,7 +79,7 @@ def _print_report(img: Path, state: RoundState, out) -> None:
     bank = state.current_bank_value()
     print()
     print(f"Screenshot: {img.name}")
-    print(f"Detected numbers: {sorted(state.numbers)}")
+    print(f"Detected numbers: {list(state.sorted_numbers)}")
     print(f"Current bank (if stay now): {bank}  (x2={state.multiplier_x2}, +mods={state.add_points}, SC={state.has_second_chance})")
     print(f"Bust prob next:      {_fmt_pct(out.bust_probability_next)}")
     print(f"EV (take 1 then stay): {out.expected_value_next:,.2f}")
@@ -70,18 +91,50 @@ def _print_report(img: Path, state: RoundState, out) -> None:
             print(f"Note: {n}")
 
 
+def _wait_for_stable_size(path: Path, interval: float = 0.02, attempts: int = 10) -> None:
+    """Wait (up to interval * attempts) until the file size stops changing, to avoid partial writes."""
+    last = -1
+    for _ in range(attempts):
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = -1
+        if size > 0 and size == last:
+            return
+        last = size
+        time.sleep(interval)
+
+
 @dataclass
 class App:
     recognizer: TemplateRecognizer
     decision: DecisionEngine
+    # Screenshots are processed off the watchdog thread, so a slow match does
+    # not hold up the next file event. One worker keeps reports in arrival
+    # order: the last report printed is always for the newest screenshot.
+    pool: ThreadPoolExecutor = field(default_factory=lambda: ThreadPoolExecutor(max_workers=1))
+    _print_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def submit(self, path: Path) -> None:
+        self.pool.submit(self.handle_image, path).add_done_callback(functools.partial(self._report_failure, path))
 
     def handle_image(self, path: Path) -> None:
-        # small delay to avoid partial writes
-        time.sleep(0.10)
+        _wait_for_stable_size(path)
         detections = self.recognizer.recognize(path)
         state = _derive_state(detections)
         out = self.decision.compute(state)
-        _print_report(path, state, out)
+        # Keep each report's lines together if handle_image is also called
+        # from another thread.
+        with self._print_lock:
+            _print_report(path, state, out)
+
+    def _report_failure(self, path: Path, future: Future) -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            with self._print_lock:
+                print(f"\nScreenshot: {path.name}\nError: {exc}")
 
 
 class NewImageHandler(FileSystemEventHandler):
@@ -95,7 +148,7 @@ class NewImageHandler(FileSystemEventHandler):
         p = Path(event.src_path)
         if p.suffix.lower() not in self.exts:
             return
-        self.app.handle_image(p)
+        self.app.submit(p)
 
     def on_moved(self, event):  # type: ignore[override]
         if event.is_directory:
@@ -105,7 +158,7 @@ class NewImageHandler(FileSystemEventHandler):
             return
         if p.suffix.lower() not in self.exts:
             return
-        self.app.handle_image(p)
+        self.app.submit(p)
 
 
 def main() -> None:
@@ -113,13 +166,15 @@ def main() -> None:
     parser.add_argument("--watch", required=True, help="Folder to watch for new screenshots.")
     parser.add_argument("--assets", default=str(Path(__file__).resolve().parents[1] / "assets"), help="Assets folder containing templates.")
     parser.add_argument("--threshold", type=float, default=0.80, help="Template match threshold (0-1).")
+    parser.add_argument("--coarse-scale", type=float, default=0.5, help="Downscale factor for the coarse matching pass (1.0 = full-resolution scan only).")
+    parser.add_argument("--opencl", action="store_true", help="Run template matching through OpenCL when a device is available.")
     parser.add_argument("--ext", action="append", default=[".png", ".jpg", ".jpeg", ".bmp"], help="Allowed image extensions (repeatable).")
 
     args = parser.parse_args()
     watch_dir = Path(args.watch).expanduser()
     assets_dir = Path(args.assets).expanduser()
 
-    recognizer = TemplateRecognizer(assets_dir=assets_dir, match_threshold=args.threshold)
+    recognizer = TemplateRecognizer(assets_dir=assets_dir, match_threshold=args.threshold, coarse_scale=args.coarse_scale, use_opencl=args.opencl)
     decision = DecisionEngine()
     app = App(recognizer=recognizer, decision=decision)
 
@@ -137,11 +192,13 @@ def main() -> None:
 
     observer.start()
     try:
-        while True:
-            time.sleep(0.5)
+        # Blocks until Ctrl+C (or the observer stopping) instead of waking up
+        # on a timer.
+        observer.join()
     except KeyboardInterrupt:
         pass
     finally:
         observer.stop()
         observer.join()
+        app.pool.shutdown(wait=False, cancel_futures=True)
 